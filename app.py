@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
-import io
+import concurrent.futures
+import json
 import os
 import shutil
 import subprocess
 import tempfile
+import threading
+import urllib.error
+import urllib.request
 import zipfile
 from pathlib import Path
 
@@ -11,6 +15,7 @@ from flask import Flask, render_template, request, send_file
 from werkzeug.utils import secure_filename
 
 APP_ROOT = Path(__file__).resolve().parent
+IEEE_DIR = APP_ROOT / "ieee"
 ASSETS = [
     "ieee/ieee-conference.tex",
     "ieee/IEEEtran.cls",
@@ -18,6 +23,14 @@ ASSETS = [
     "ieee/ieee.csl",
     "ieee/pandoc-csl-fix.tex",
 ]
+FORMAT_DIR = Path(os.getenv("IEEE_FORMAT_DIR", "/opt/texformats"))
+HAS_PAPER_FORMAT = (FORMAT_DIR / "paper.fmt").is_file()
+
+# Point IEEE_TMP at a tmpfs (e.g. /dev/shm/ieee-convert) to keep the aux/log/bbl
+# churn of the LaTeX passes off the block device.
+TMP_ROOT = Path(os.getenv("IEEE_TMP") or tempfile.gettempdir()).resolve()
+TMP_ROOT.mkdir(mode=0o700, parents=True, exist_ok=True)
+PANDOC_SERVER_URL = os.getenv("PANDOC_SERVER_URL", "")
 
 ALLOWED_MD = {"md"}
 ALLOWED_BIB = {"bib"}
@@ -25,34 +38,39 @@ ALLOWED_ZIP = {"zip"}
 
 app = Flask(__name__)
 app.config["MAX_CONTENT_LENGTH"] = 100 * 1024 * 1024  # 100 MB
+UPLOAD_BUFFER_SIZE = 1024 * 1024  # 1 MB chunks when saving uploads
+UNZIP_BUFFER_SIZE = 1024 * 1024  # 1 MB chunks when extracting figures
+# Cap concurrent pandoc/LaTeX runs so a burst of uploads queues instead of thrashing.
+CONVERSION_SLOTS = threading.BoundedSemaphore(max(1, (os.cpu_count() or 2) - 1))
 
 
 def _allowed(filename: str, exts: set[str]) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in exts
 
 
-def _copy_assets(dest: Path) -> None:
+def _check_assets() -> None:
+    # The assets ship with the app, so verify them once at startup rather than per job.
     for name in ASSETS:
-        src = APP_ROOT / name
-        if not src.exists():
+        if not (APP_ROOT / name).is_file():
             raise FileNotFoundError(f"Missing required asset: {name}")
-        target = dest / name
-        target.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy(src, target)
+
+
+_check_assets()
 
 
 def _link_paper_assets(src_dir: Path, work_dir: Path) -> list[Path]:
     links: list[Path] = []
-    if not src_dir.exists():
-        return links
-    for entry in src_dir.iterdir():
-        if entry.suffix in (".md", ".bib"):
-            continue
-        target = work_dir / entry.name
-        if target.exists():
-            continue
-        target.symlink_to(entry)
-        links.append(target)
+    with os.scandir(src_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith((".md", ".bib")):
+                continue
+            target = work_dir / entry.name
+            # work_dir is a fresh job dir, so just try the link instead of stat'ing.
+            try:
+                target.symlink_to(entry.path)
+            except FileExistsError:
+                continue
+            links.append(target)
     return links
 
 
@@ -60,91 +78,88 @@ def _run(cmd: list[str], cwd: Path, env: dict[str, str]) -> None:
     subprocess.run(cmd, cwd=cwd, env=env, check=True, capture_output=True, text=True)
 
 
+def _convert_with_server(md_path: Path, tex_path: Path) -> None:
+    payload = {
+        "text": md_path.read_text(),
+        "from": "markdown",
+        "to": "latex",
+        "standalone": True,
+        "template": (IEEE_DIR / "ieee-conference.tex").read_text(),
+        "cite-method": "natbib",
+    }
+    req = urllib.request.Request(
+        PANDOC_SERVER_URL,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json", "Accept": "text/plain"},
+    )
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        tex_path.write_text(resp.read().decode("utf-8"))
+
+
 def _run_conversion(work: Path, paper_dir: Path) -> None:
     out_rel = Path("outputs")
     out_dir = work / out_rel
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    ieee_dir = work / "ieee"
     env = os.environ.copy()
-    env["TEXINPUTS"] = f"{ieee_dir}:{env.get('TEXINPUTS', '')}:"
+    env["TEXINPUTS"] = f"{IEEE_DIR}:{env.get('TEXINPUTS', '')}:"
     env["BIBINPUTS"] = f"{paper_dir}:{out_dir}:{env.get('BIBINPUTS', '')}:"
-    env["BSTINPUTS"] = f"{ieee_dir}:{paper_dir}:{out_dir}:{env.get('BSTINPUTS', '')}:"
-
-    _run(
-        [
-            "pandoc",
-            str(paper_dir / "paper.md"),
-            "--template",
-            str(Path("ieee") / "ieee-conference.tex"),
-            "--natbib",
-            "-s",
-            "-o",
-            str(out_rel / "paper.tex"),
-        ],
-        cwd=work,
-        env=env,
-    )
-
-    tex_path = out_dir / "paper.tex"
-    text = tex_path.read_text()
-    tex_path.write_text(text.replace(r"\citep", r"\cite"))
-
-    for ext in ("aux", "bbl", "blg", "out", "log", "pdf"):
+    env["BSTINPUTS"] = f"{IEEE_DIR}:{paper_dir}:{out_dir}:{env.get('BSTINPUTS', '')}:"
+
+    if PANDOC_SERVER_URL:
+        _convert_with_server(paper_dir / "paper.md", out_dir / "paper.tex")
+    else:
+        _run(
+            [
+                "pandoc",
+                str(paper_dir / "paper.md"),
+                "--template",
+                str(IEEE_DIR / "ieee-conference.tex"),
+                "--natbib",
+                "-s",
+                "-o",
+                str(out_rel / "paper.tex"),
+            ],
+            cwd=work,
+            env=env,
+        )
+
+    for ext in ("aux", "bbl", "blg", "out", "log", "fls", "fdb_latexmk", "pdf"):
         (out_dir / f"paper.{ext}").unlink(missing_ok=True)
 
-    for bib in paper_dir.glob("*.bib"):
-        shutil.copy(bib, out_dir / bib.name)
-
-    _run(
-        [
-            "pdflatex",
-            "-interaction=nonstopmode",
-            "-halt-on-error",
-            "-output-directory",
-            str(out_rel),
-            str(out_rel / "paper.tex"),
-        ],
-        cwd=work,
-        env=env,
-    )
-    _run(["bibtex", str(out_rel / "paper")], cwd=work, env=env)
-    _run(
-        [
-            "pdflatex",
-            "-interaction=nonstopmode",
-            "-halt-on-error",
-            "-output-directory",
-            str(out_rel),
-            str(out_rel / "paper.tex"),
-        ],
-        cwd=work,
-        env=env,
-    )
-    _run(
-        [
-            "pdflatex",
-            "-interaction=nonstopmode",
-            "-halt-on-error",
-            "-output-directory",
-            str(out_rel),
-            str(out_rel / "paper.tex"),
-        ],
-        cwd=work,
-        env=env,
-    )
+    latexmk_cmd = [
+        "latexmk",
+        "-pdf",
+        "-bibtex",
+        "-interaction=nonstopmode",
+        "-halt-on-error",
+        f"-outdir={out_rel}",
+    ]
+    if HAS_PAPER_FORMAT:
+        # Template preamble preloaded at image build time; see Dockerfile.
+        env["TEXFORMATS"] = f"{FORMAT_DIR}:{env.get('TEXFORMATS', '')}:"
+        latexmk_cmd.append("-pdflatex=pdflatex -fmt=paper %O %S")
+    latexmk_cmd.append(str(out_rel / "paper.tex"))
+
+    _run(latexmk_cmd, cwd=work, env=env)
 
 
 def _safe_extract_zip(zip_path: Path, dest: Path) -> None:
-    dest_resolved = dest.resolve()
+    # Pure string normalisation: no per-component stat/readlink like resolve().
+    dest_prefix = os.path.abspath(dest) + os.sep
     with zipfile.ZipFile(zip_path) as zf:
         for member in zf.infolist():
-            member_path = (dest / member.filename).resolve()
-            try:
-                member_path.relative_to(dest_resolved)
-            except ValueError:
+            member_path = os.path.normpath(os.path.join(dest_prefix, member.filename))
+            if not (member_path + os.sep).startswith(dest_prefix):
                 raise ValueError("Zip file contains an unsafe path.")
-        zf.extractall(dest)
+        for member in zf.infolist():
+            target = dest / member.filename
+            if member.is_dir():
+                target.mkdir(parents=True, exist_ok=True)
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with zf.open(member) as src, open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst, UNZIP_BUFFER_SIZE)
 
 
 @app.route("/", methods=["GET", "POST"])
@@ -170,31 +185,40 @@ def index():
     if not _allowed(fig_zip.filename, ALLOWED_ZIP):
         return render_template("index.html", error="Figures upload must be a .zip.")
 
-    with tempfile.TemporaryDirectory(prefix="ieee-convert-") as tmpdir:
+    with tempfile.TemporaryDirectory(prefix="ieee-convert-", dir=TMP_ROOT) as tmpdir:
         work = Path(tmpdir)
         paper_dir = work / "paperFiles"
         paper_dir.mkdir(parents=True, exist_ok=True)
 
         try:
-            _copy_assets(work)
-
             md_path = paper_dir / "paper.md"
-            md_file.save(md_path)
-
             bib_name = secure_filename(bib_file.filename) or "library.bib"
             bib_path = paper_dir / bib_name
-            bib_file.save(bib_path)
+            zip_path = work / "figures.zip"
 
-            if bib_name != "library.bib":
-                shutil.copy(bib_path, paper_dir / "library.bib")
+            # The three uploads are independent, so write them out concurrently.
+            uploads = [(md_file, md_path), (bib_file, bib_path), (fig_zip, zip_path)]
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(uploads)) as pool:
+                futures = [
+                    pool.submit(upload.save, target, buffer_size=UPLOAD_BUFFER_SIZE)
+                    for upload, target in uploads
+                ]
+                for future in futures:
+                    future.result()
 
-            zip_path = work / "figures.zip"
-            fig_zip.save(zip_path)
             _safe_extract_zip(zip_path, paper_dir)
 
+            if bib_name != "library.bib":
+                # Papers use `bibliography: library`; alias the upload to that name.
+                try:
+                    (paper_dir / "library.bib").symlink_to(bib_name)
+                except FileExistsError:
+                    pass
+
             links = _link_paper_assets(paper_dir, work)
             try:
-                _run_conversion(work, paper_dir)
+                with CONVERSION_SLOTS:
+                    _run_conversion(work, paper_dir)
             finally:
                 for link in links:
                     link.unlink(missing_ok=True)
@@ -203,17 +227,32 @@ def index():
             if not pdf_path.exists():
                 raise FileNotFoundError("PDF was not generated.")
 
-            pdf_bytes = pdf_path.read_bytes()
-            return send_file(
-                io.BytesIO(pdf_bytes),
+            # Move the PDF out of the work dir so it outlives the context manager
+            # and can be streamed from disk, then drop it once the response closes.
+            fd, final_name = tempfile.mkstemp(prefix="ieee-convert-", suffix=".pdf", dir=TMP_ROOT)
+            os.close(fd)
+            final_path = Path(final_name)
+            shutil.move(pdf_path, final_path)
+
+            response = send_file(
+                final_path,
                 mimetype="application/pdf",
                 as_attachment=True,
                 download_name="paper.pdf",
             )
-        except (OSError, subprocess.CalledProcessError, ValueError) as exc:
+            response.call_on_close(lambda: final_path.unlink(missing_ok=True))
+            return response
+        except (
+            OSError,
+            subprocess.CalledProcessError,
+            ValueError,
+            zipfile.BadZipFile,
+        ) as exc:
             log = ""
             if isinstance(exc, subprocess.CalledProcessError):
                 log = (exc.stdout or "") + ("\n" + exc.stderr if exc.stderr else "")
+            elif isinstance(exc, urllib.error.HTTPError):
+                log = exc.read().decode("utf-8", errors="replace")
             return render_template(
                 "index.html",
                 error=str(exc),
@@ -1,9 +1,11 @@
 import io
+import json
 import shutil
 import sys
 import zipfile
 from pathlib import Path
 import struct
+import urllib.error
 import zlib
 
 import pytest
@@ -11,16 +13,17 @@ import pytest
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
+import app as app_module
 from app import app
 
 
 def _has_deps() -> bool:
-    return all(shutil.which(cmd) for cmd in ("pandoc", "pdflatex", "bibtex"))
+    return all(shutil.which(cmd) for cmd in ("pandoc", "latexmk", "pdflatex", "bibtex"))
 
 
 def _zip_bytes(files: dict[str, bytes]) -> bytes:
     buf = io.BytesIO()
-    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as zf:
         for name, data in files.items():
             zf.writestr(name, data)
     return buf.getvalue()
@@ -56,18 +59,22 @@ def _png_bytes() -> bytes:
     return signature + chunk(b"IHDR", ihdr_data) + chunk(b"IDAT", idat_data) + chunk(b"IEND", b"")
 
 
+_PNG_BYTES = _png_bytes()
+_ZIP_BYTES = _zip_bytes({"result_plots/test.png": _PNG_BYTES})
+
+
 @pytest.mark.skipif(not _has_deps(), reason="pandoc/latex not installed")
-def test_upload_converts_to_pdf():
+@pytest.mark.parametrize("bib_name", ["library.bib", "refs.bib"])
+def test_upload_converts_to_pdf(bib_name):
     client = app.test_client()
 
     md = b"""---\ntitle: \"Test Paper\"\nauthor: \"Test Author\"\nbibliography: library\n---\n\nCite [@Test2024].\n\n![Test](result_plots/test.png)\n"""
     bib = b"""@article{Test2024,\n  title={Test Entry},\n  author={Doe, Jane},\n  journal={Test Journal},\n  year={2024}\n}\n"""
-    png_bytes = _png_bytes()
-    zip_bytes = _zip_bytes({"result_plots/test.png": png_bytes})
+    zip_bytes = _ZIP_BYTES
 
     data = {
         "md_file": (io.BytesIO(md), "paper.md"),
-        "bib_file": (io.BytesIO(bib), "library.bib"),
+        "bib_file": (io.BytesIO(bib), bib_name),
         "fig_zip": (io.BytesIO(zip_bytes), "figures.zip"),
     }
     resp = client.post("/", data=data, content_type="multipart/form-data")
@@ -101,3 +108,155 @@ def test_zip_path_traversal_rejected():
 
     assert resp.status_code == 200
     assert b"unsafe path" in resp.data
+
+
+def test_pandoc_server_payload(monkeypatch, tmp_path):
+    captured = {}
+
+    def fake_urlopen(req, timeout):
+        captured["url"] = req.full_url
+        captured["payload"] = json.loads(req.data)
+        return io.BytesIO(b"\\documentclass{IEEEtran}")
+
+    monkeypatch.setattr(app_module, "PANDOC_SERVER_URL", "http://pandoc:3030")
+    monkeypatch.setattr(app_module.urllib.request, "urlopen", fake_urlopen)
+
+    md_path = tmp_path / "paper.md"
+    md_path.write_text("Cite [@Test2024].\n")
+    tex_path = tmp_path / "paper.tex"
+    app_module._convert_with_server(md_path, tex_path)
+
+    assert tex_path.read_text() == "\\documentclass{IEEEtran}"
+    assert captured["url"] == "http://pandoc:3030"
+    payload = captured["payload"]
+    assert payload["text"] == "Cite [@Test2024].\n"
+    assert payload["to"] == "latex"
+    assert payload["cite-method"] == "natbib"
+    assert payload["standalone"] is True
+    assert payload["template"] == (ROOT / "ieee" / "ieee-conference.tex").read_text()
+
+
+def test_pandoc_server_error_shows_response_body(monkeypatch):
+    def fake_urlopen(req, timeout):
+        raise urllib.error.HTTPError(
+            req.full_url, 500, "Internal Server Error", {}, io.BytesIO(b"pandoc: bad template")
+        )
+
+    monkeypatch.setattr(app_module, "PANDOC_SERVER_URL", "http://pandoc:3030")
+    monkeypatch.setattr(app_module.urllib.request, "urlopen", fake_urlopen)
+    client = app.test_client()
+
+    md = b"title: Test\n"
+    bib = b"@article{Test2024, title={Test}, author={Doe}, year={2024}}\n"
+    data = {
+        "md_file": (io.BytesIO(md), "paper.md"),
+        "bib_file": (io.BytesIO(bib), "library.bib"),
+        "fig_zip": (io.BytesIO(_ZIP_BYTES), "figures.zip"),
+    }
+    resp = client.post("/", data=data, content_type="multipart/form-data")
+
+    assert resp.status_code == 200
+    assert b"HTTP Error 500" in resp.data
+    assert b"pandoc: bad template" in resp.data
+
+
+@pytest.mark.parametrize("name", ["/abs/evil", "a/../../evil", "../paperFiles2/x"])
+def test_safe_extract_rejects_escaping_paths(tmp_path, name):
+    dest = tmp_path / "paperFiles"
+    dest.mkdir()
+    zip_path = tmp_path / "figures.zip"
+    zip_path.write_bytes(_zip_bytes({name: b"nope"}))
+
+    with pytest.raises(ValueError, match="unsafe path"):
+        app_module._safe_extract_zip(zip_path, dest)
+    assert list(tmp_path.rglob("evil")) == []
+    assert not (tmp_path / "paperFiles2").exists()
+
+
+def _members_zip(compress_type: int) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr(zipfile.ZipInfo("result_plots/"), b"")
+        zf.writestr("result_plots/plot.png", _PNG_BYTES * 50, compress_type=compress_type)
+        zf.writestr("notes.txt", b"figure notes\n" * 100, compress_type=compress_type)
+    return buf.getvalue()
+
+
+def _assert_extracted(zip_path: Path, dest: Path) -> None:
+    with zipfile.ZipFile(zip_path) as zf:
+        for member in zf.infolist():
+            target = dest / member.filename
+            if member.is_dir():
+                assert target.is_dir()
+            else:
+                assert target.read_bytes() == zf.read(member)
+
+
+@pytest.mark.parametrize("compress_type", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+def test_safe_extract_members(tmp_path, compress_type):
+    dest = tmp_path / "paperFiles"
+    dest.mkdir()
+    zip_path = tmp_path / "figures.zip"
+    zip_path.write_bytes(_members_zip(compress_type))
+
+    app_module._safe_extract_zip(zip_path, dest)
+
+    _assert_extracted(zip_path, dest)
+
+
+def test_safe_extract_with_prepended_data(tmp_path):
+    dest = tmp_path / "paperFiles"
+    dest.mkdir()
+    zip_path = tmp_path / "figures.zip"
+    zip_path.write_bytes(b"#!/bin/sh\nexit 0\n" * 20 + _members_zip(zipfile.ZIP_STORED))
+
+    app_module._safe_extract_zip(zip_path, dest)
+
+    _assert_extracted(zip_path, dest)
+
+
+def _patch_first_central_sizes(data: bytes, compress_size: int, file_size: int) -> bytes:
+    pos = data.index(b"PK\x01\x02")
+    sizes = struct.pack("<II", compress_size, file_size)
+    return data[: pos + 20] + sizes + data[pos + 28 :]
+
+
+def test_safe_extract_rejects_stored_crc_mismatch(tmp_path):
+    dest = tmp_path / "paperFiles"
+    dest.mkdir()
+    data = _zip_bytes({"a.txt": b"A" * 10, "b.txt": b"B" * 30})
+    zip_path = tmp_path / "figures.zip"
+    zip_path.write_bytes(_patch_first_central_sizes(data, 40, 40))
+
+    with pytest.raises(zipfile.BadZipFile):
+        app_module._safe_extract_zip(zip_path, dest)
+
+
+def _post_figures(zip_bytes: bytes):
+    client = app.test_client()
+    md = b"title: Test\n"
+    bib = b"@article{Test2024, title={Test}, author={Doe}, year={2024}}\n"
+    data = {
+        "md_file": (io.BytesIO(md), "paper.md"),
+        "bib_file": (io.BytesIO(bib), "library.bib"),
+        "fig_zip": (io.BytesIO(zip_bytes), "figures.zip"),
+    }
+    return client.post("/", data=data, content_type="multipart/form-data")
+
+
+def test_upload_with_corrupt_zip_member_shows_error():
+    data = _zip_bytes({"a.txt": b"A" * 10, "b.txt": b"B" * 30})
+    resp = _post_figures(_patch_first_central_sizes(data, 40, 40))
+
+    assert resp.status_code == 200
+    assert b"Bad CRC-32" in resp.data
+
+
+def test_upload_with_overlapping_zip_entries_shows_error():
+    data = _zip_bytes({"a.png": _PNG_BYTES, "b.png": _PNG_BYTES})
+    second = data.index(b"PK\x01\x02", data.index(b"PK\x01\x02") + 4)
+    data = data[: second + 42] + struct.pack("<I", 0) + data[second + 46 :]
+    resp = _post_figures(data)
+
+    assert resp.status_code == 200
+    assert b"differ" in resp.data